@@ -1,18 +1,119 @@
+import csv
+import io
+import json
 import os
-import pandas as pd
-import joblib
-from flask import Flask, request, jsonify, render_template
+import time
+from itertools import islice
+
+import numpy as np
+from flask import Flask, Response, g, request, jsonify, render_template
 from flask_cors import CORS
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from metrics import Metrics, counter_lines, recorder_from_env
+from prediction_cache import cache_from_env
+from registry import registry_from_env
+from scoring import FEATURES, coerce_features
 
 app = Flask(__name__)
 CORS(app)
 
-# Load the model
-try:
-    model = joblib.load("credit_risk_model.pkl")
-except Exception as e:
-    print(f"Error loading model: {e}")
-    model = None
+# Largest number of applicants accepted by a single /predict/batch call
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", 10000))
+# Request bodies above this are refused with 413 before they are read; the
+# default allows ~2 KB per applicant, several times a typical JSON row
+app.config["MAX_CONTENT_LENGTH"] = int(
+    os.environ.get("MAX_CONTENT_LENGTH", MAX_BATCH_SIZE * 2048)
+)
+
+# Request/stage latency metrics served at /metrics
+metrics = Metrics(enabled=os.environ.get("METRICS_ENABLED", "1") == "1")
+
+# Opt-in recording of scoring traffic (RECORD_REQUESTS=1)
+recorder = recorder_from_env()
+RECORDED_ENDPOINTS = ("/predict", "/predict/batch")
+
+# Load and validate the model; the registry keeps polling for new versions
+registry = registry_from_env()
+
+# Cache of single-applicant predictions (off unless CACHE_SIZE is set)
+cache = cache_from_env()
+if cache:
+    registry.on_swap.append(lambda version: cache.clear())
+
+
+def read_batch(limit):
+    """Parse the /predict/batch body into a list of applicant dicts.
+
+    Accepts a JSON array (or {"applicants": [...]}), NDJSON and CSV bodies.
+    NDJSON and CSV rows are read lazily and reading stops after ``limit + 1``
+    rows, which is enough to tell that the batch is too large.
+    """
+    mimetype = request.mimetype
+
+    if mimetype == "text/csv":
+        reader = csv.DictReader(io.StringIO(request.get_data(as_text=True)))
+        # Empty CSV cells fall back to the feature defaults
+        return [
+            {k: v for k, v in row.items() if v not in ("", None)}
+            for row in islice(reader, limit + 1)
+        ]
+
+    if mimetype in ("application/x-ndjson", "application/jsonlines"):
+        rows = []
+        lines = io.StringIO(request.get_data(as_text=True))
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            if len(rows) > limit:
+                break
+            try:
+                rows.append(json.loads(line))
+            except ValueError as e:
+                raise ValueError(f"Invalid JSON on line {number}: {e}")
+        return rows
+
+    data = request.get_json()
+    if isinstance(data, dict):
+        data = data.get("applicants")
+    if not isinstance(data, list):
+        raise ValueError('Expected a JSON array or {"applicants": [...]}')
+    return data
+
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+    # Poll for model files even while no scoring traffic arrives, e.g. when a
+    # load balancer only sends /ready until the first model has loaded
+    registry.start()
+
+
+@app.after_request
+def record_request(response):
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    elapsed = time.perf_counter() - g.get("request_start", time.perf_counter())
+    metrics.observe_request(endpoint, response.status_code, elapsed)
+    # Oversized bodies were never read; reading them here would raise again
+    if recorder and endpoint in RECORDED_ENDPOINTS and response.status_code != 413:
+        try:
+            # Served from the cache filled while handling the request
+            body = request.get_data()
+        except RequestEntityTooLarge:
+            body = b""
+        # Raw bytes only; decoding happens in the recorder's writer thread
+        recorder.record(
+            {
+                "time": time.time(),
+                "endpoint": endpoint,
+                "content_type": request.mimetype,
+                "status": response.status_code,
+                "latency_ms": elapsed * 1000,
+            },
+            body,
+            response.get_data(),
+        )
+    return response
 
 
 @app.route("/")
@@ -22,31 +123,181 @@ def index():
 
 @app.route("/predict", methods=["POST"])
 def predict():
-    if not model:
+    version, shadow = registry.route()
+    if not version:
         return jsonify({"error": "Model not loaded. Please check server logs."}), 500
 
+    stage = metrics.stage
     try:
-        data = request.json
+        with stage("parse"):
+            data = request.json
+        with stage("coerce"):
+            row = coerce_features(data)
 
-        # Create a DataFrame from inputs
-        input_data = pd.DataFrame(
-            {
-                "fico_range_low": [float(data.get("fico_range_low", 700))],
-                "annual_inc": [float(data.get("annual_inc", 48000))],
-                "dti": [float(data.get("dti", 20))],
-                "loan_amnt": [float(data.get("loan_amnt", 9000))],
-                "revol_bal": [float(data.get("revol_bal", 5000))],
-            }
+        # The closed-form scorer is cheaper than a cache lookup, so only the
+        # sklearn fallback and micro-batched scoring go through the cache
+        use_cache = cache and (version.scorer is None or version.batcher)
+        with stage("cache_lookup"):
+            prob = cache.get(row, version.version) if use_cache else None
+        if prob is None:
+            # Probability of approval (class 1)
+            with stage("score"):
+                prob = float(version.score(row))
+            if use_cache:
+                cache.set(row, prob, version.version)
+
+        if shadow:
+            registry.shadow_score(shadow, np.array([row]), [prob])
+
+        with stage("serialize"):
+            return jsonify({"probability": prob, "model_version": version.version})
+    except RequestEntityTooLarge:
+        # Bodies over MAX_CONTENT_LENGTH keep their 413
+        raise
+    except TimeoutError as e:
+        # The micro-batcher is overloaded; the request itself was fine
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
+
+@app.route("/ready")
+def readiness():
+    # The registry only activates a model after it has scored the holdout
+    if not registry.active:
+        return jsonify({"status": "loading"}), 503
+    return jsonify({"status": "ready"})
+
+
+@app.route("/cache/stats")
+def cache_stats():
+    if not cache:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **cache.stats()})
+
+
+@app.route("/batcher/stats")
+def batcher_stats():
+    batcher = registry.active.batcher if registry.active else None
+    if not batcher:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **batcher.stats()})
+
+
+@app.route("/models")
+def models():
+    return jsonify(registry.stats())
+
+
+@app.route("/metrics")
+def prometheus_metrics():
+    lines = metrics.render()
+
+    lines += [
+        "# HELP credit_risk_model_load_seconds Load, validation and warm-up time.",
+        "# TYPE credit_risk_model_load_seconds gauge",
+    ]
+    for slot, version in (
+        ("active", registry.active),
+        ("candidate", registry.candidate),
+    ):
+        if version:
+            lines.append(
+                f'credit_risk_model_load_seconds{{slot="{slot}",'
+                f'version="{version.version}"}} {version.load_seconds}'
+            )
+    lines += counter_lines(
+        "credit_risk_model_swaps_total", "Model versions swapped in.", registry.swaps
+    )
+
+    if cache:
+        stats = cache.stats()
+        for name in ("hits", "shared_hits", "misses", "evictions", "expirations"):
+            lines += counter_lines(
+                f"credit_risk_cache_{name}_total",
+                f"Prediction cache {name.replace('_', ' ')}.",
+                stats[name],
+            )
+
+    batcher = registry.active.batcher if registry.active else None
+    if batcher:
+        lines += ["# TYPE credit_risk_microbatch_size histogram"]
+        lines += batcher.batch_sizes.prometheus("credit_risk_microbatch_size")
+        lines += ["# TYPE credit_risk_microbatch_queue_delay_ms histogram"]
+        lines += batcher.queue_delays.prometheus(
+            "credit_risk_microbatch_queue_delay_ms"
+        )
+
+    if recorder:
+        lines += counter_lines(
+            "credit_risk_recorder_dropped_total",
+            "Recorded requests dropped because the buffer was full.",
+            recorder.dropped,
         )
 
-        # Probability of approval (class 1)
-        prob = model.predict_proba(input_data)[0][1]
+    return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
 
-        return jsonify({"probability": float(prob)})
+
+@app.route("/predict/batch", methods=["POST"])
+def predict_batch():
+    version, shadow = registry.route()
+    if not version:
+        return jsonify({"error": "Model not loaded. Please check server logs."}), 500
+
+    stage = metrics.stage
+    start = time.perf_counter()
+    try:
+        with stage("batch_parse"):
+            rows = read_batch(MAX_BATCH_SIZE)
+    except RequestEntityTooLarge:
+        # Bodies over MAX_CONTENT_LENGTH keep their 413
+        raise
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
+    if len(rows) > MAX_BATCH_SIZE:
+        return (
+            jsonify({"error": f"Batch exceeds the limit of {MAX_BATCH_SIZE} rows"}),
+            413,
+        )
+
+    # Validate every row up front; bad rows get an error instead of a score
+    results = [{"index": i} for i in range(len(rows))]
+    features = np.empty((len(rows), len(FEATURES)))
+    valid = []
+    with stage("batch_coerce"):
+        for i, row in enumerate(rows):
+            try:
+                features[len(valid)] = coerce_features(row)
+                valid.append(i)
+            except Exception as e:
+                results[i]["error"] = str(e)
+
+    # Score all valid rows in a single vectorized call
+    if valid:
+        with stage("batch_score"):
+            probs = version.score_many(features[: len(valid)])
+        if shadow:
+            registry.shadow_score(shadow, features[: len(valid)], probs)
+        for i, prob in zip(valid, probs.tolist()):
+            results[i]["probability"] = prob
+
+    elapsed = time.perf_counter() - start
+    with stage("batch_serialize"):
+        return jsonify(
+            {
+                "results": results,
+                "model_version": version.version,
+                "count": len(rows),
+                "scored": len(valid),
+                "failed": len(rows) - len(valid),
+                "elapsed_ms": round(elapsed * 1000, 3),
+                "rows_per_second": round(len(rows) / elapsed, 1) if elapsed else None,
+            }
+        )
+
 
 if __name__ == "__main__":
-    # Runs the application on port 5000
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    # Development server; use gunicorn.conf.py for production serving
+    registry.start()
+    app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 5000)), debug=True)
@@ -0,0 +1,131 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+import numpy as np
+
+from metrics import Histogram
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+QUEUE_DELAY_BUCKETS_MS = (0.1, 0.5, 1, 2, 5, 10, 25, 50, 100)
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-row scoring calls into vectorized batches.
+
+    Callers block in ``score`` while a background thread collects rows that
+    arrive within ``window_ms`` of the first one (or until ``max_batch_size``
+    is reached), scores them with one ``score_many`` call and hands each
+    caller its own result.
+    """
+
+    def __init__(self, score_many, window_ms=2.0, max_batch_size=64):
+        self.score_many = score_many
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pid = None
+        self._closed = False
+
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_delays = Histogram(QUEUE_DELAY_BUCKETS_MS)
+        self.errors = 0
+
+    def _ensure_started(self):
+        # Threads do not survive fork, so each gunicorn worker starts its own
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+                threading.Thread(target=self._run, daemon=True).start()
+                self._pid = os.getpid()
+
+    def score(self, row, timeout=5.0):
+        """Probability for one feature row, scored as part of a batch."""
+        self._ensure_started()
+        future = Future()
+        # Checked under the lock that close() takes, so nothing can be queued
+        # behind the stop sentinel and left without a result
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                self._queue.put((row, time.perf_counter(), future))
+        if closed:
+            return float(self.score_many(np.array([row]))[0])
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            raise TimeoutError(f"Micro-batch not scored within {timeout}s")
+
+    def close(self):
+        """Stop the background thread once the rows already queued are scored."""
+        with self._lock:
+            self._closed = True
+            if self._pid == os.getpid():
+                self._queue.put(None)
+
+    def _collect(self):
+        """Block for the first request, then gather more until the window ends."""
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            stop = None in batch
+            batch = [item for item in batch if item is not None]
+            if not batch:
+                return
+            started = time.perf_counter()
+            with self._lock:
+                self.batch_sizes.observe(len(batch))
+                for _, enqueued, _ in batch:
+                    self.queue_delays.observe((started - enqueued) * 1000)
+            try:
+                probs = self.score_many(np.array([row for row, _, _ in batch]))
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                for _, _, future in batch:
+                    future.set_exception(e)
+            else:
+                for (_, _, future), prob in zip(batch, probs.tolist()):
+                    future.set_result(prob)
+            if stop:
+                return
+
+    def stats(self):
+        with self._lock:
+            return {
+                "window_ms": self.window * 1000,
+                "max_batch_size": self.max_batch_size,
+                "batch_size": self.batch_sizes.snapshot(),
+                "queue_delay_ms": self.queue_delays.snapshot(),
+                "errors": self.errors,
+            }
+
+
+def batcher_from_env(score_many):
+    """Build the micro-batcher from environment variables (None if off)."""
+    window_ms = float(os.environ.get("MICROBATCH_WINDOW_MS", 0))
+    if window_ms <= 0:
+        return None
+    return MicroBatcher(
+        score_many,
+        window_ms=window_ms,
+        max_batch_size=int(os.environ.get("MICROBATCH_MAX_SIZE", 64)),
+    )
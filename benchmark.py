@@ -0,0 +1,196 @@
+"""Reproducible benchmark of the scoring path in single, batch and concurrent modes.
+
+Replays traffic recorded with RECORD_REQUESTS=1 (or rows from
+smaller_dataset.csv when nothing is recorded) through the Flask app
+in-process, so results depend only on the code and the machine. With
+--baseline the run fails if throughput or median latency regresses by more
+than --threshold against a previously saved run.
+
+    python benchmark.py --save-baseline benchmark_baseline.json
+    python benchmark.py --baseline benchmark_baseline.json --threshold 0.25
+"""
+
+import argparse
+import csv
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from loadtest import percentile
+from metrics import RECORD_PATH
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET = os.path.join(BASE_DIR, "smaller_dataset.csv")
+
+
+def load_recorded(path):
+    """Applicant payloads from a request recording (empty if there is none)."""
+    payloads = []
+    if not os.path.exists(path):
+        return payloads
+    with open(path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(entry, dict) or entry.get("status") != 200:
+                continue
+            if entry.get("endpoint") == "/predict":
+                payloads.append(json.loads(entry["request"]))
+            elif (
+                entry.get("endpoint") == "/predict/batch"
+                and entry.get("content_type") == "application/json"
+            ):
+                body = json.loads(entry["request"])
+                payloads += body["applicants"] if isinstance(body, dict) else body
+    return payloads
+
+
+def load_dataset(path):
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    for row in rows:
+        row.pop("loan_status", None)
+    return [{k: float(v) for k, v in row.items()} for row in rows]
+
+
+def run_single(client, payloads):
+    latencies = []
+    start = time.perf_counter()
+    for payload in payloads:
+        t = time.perf_counter()
+        client.post("/predict", json=payload)
+        latencies.append(time.perf_counter() - t)
+    return len(payloads), time.perf_counter() - start, latencies
+
+
+def run_batch(client, payloads, batch_size):
+    latencies = []
+    start = time.perf_counter()
+    for i in range(0, len(payloads), batch_size):
+        t = time.perf_counter()
+        client.post("/predict/batch", json=payloads[i : i + batch_size])
+        latencies.append(time.perf_counter() - t)
+    return len(payloads), time.perf_counter() - start, latencies
+
+
+def run_concurrent(app, payloads, threads):
+    def worker(chunk):
+        return run_single(app.test_client(), chunk)[2]
+
+    chunks = [payloads[i::threads] for i in range(threads)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        latencies = [lat for result in pool.map(worker, chunks) for lat in result]
+    return len(payloads), time.perf_counter() - start, latencies
+
+
+def summarize(runs):
+    """Median throughput and latency percentiles over repeated runs."""
+    results = []
+    for rows, elapsed, latencies in runs:
+        latencies = sorted(latencies)
+        results.append(
+            {
+                "rows_per_second": rows / elapsed,
+                "p50_ms": percentile(latencies, 50) * 1000,
+                "p99_ms": percentile(latencies, 99) * 1000,
+            }
+        )
+    return {
+        key: statistics.median(result[key] for result in results) for key in results[0]
+    }
+
+
+def compare(results, baseline, threshold):
+    """Messages for every mode that regressed beyond ``threshold``."""
+    failures = []
+    for mode, result in results.items():
+        base = baseline.get(mode)
+        if not base:
+            continue
+        if result["rows_per_second"] < base["rows_per_second"] * (1 - threshold):
+            failures.append(
+                f"{mode}: {result['rows_per_second']:.0f} rows/s is below baseline"
+                f" {base['rows_per_second']:.0f} rows/s"
+            )
+        if result["p50_ms"] > base["p50_ms"] * (1 + threshold):
+            failures.append(
+                f"{mode}: p50 {result['p50_ms']:.3f} ms is above baseline"
+                f" {base['p50_ms']:.3f} ms"
+            )
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--recording",
+        default=RECORD_PATH,
+        help="request recording to replay",
+    )
+    parser.add_argument("--rows", type=int, default=2000, help="single/concurrent rows")
+    parser.add_argument("--batch-rows", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", help="fail on regressions against this file")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--save-baseline", help="write results to this file")
+    args = parser.parse_args(argv)
+
+    payloads = load_recorded(args.recording)
+    source = args.recording
+    if not payloads:
+        payloads, source = load_dataset(DATASET), DATASET
+
+    def take(n):
+        # Cycle through the payloads so every mode sees the same rows in order
+        return [payloads[i % len(payloads)] for i in range(n)]
+
+    # Measure the scoring path itself, not cache hits, recording or model
+    # polling; the app reads these settings when it is imported
+    os.environ["CACHE_SIZE"] = "0"
+    os.environ["RECORD_REQUESTS"] = "0"
+    os.environ["MODEL_POLL_INTERVAL"] = "0"
+    import app as service
+
+    client = service.app.test_client()
+    single_rows, batch_rows = take(args.rows), take(args.batch_rows)
+    modes = {
+        "single": lambda: run_single(client, single_rows),
+        "batch": lambda: run_batch(client, batch_rows, args.batch_size),
+        "concurrent": lambda: run_concurrent(service.app, single_rows, args.threads),
+    }
+
+    print(f"Replaying {len(payloads)} payloads from {source}")
+    results = {}
+    for mode, run in modes.items():
+        run()  # warm-up
+        results[mode] = summarize([run() for _ in range(args.repeat)])
+        r = results[mode]
+        print(
+            f"{mode:>10}: {r['rows_per_second']:>10,.0f} rows/s,"
+            f" p50 {r['p50_ms']:.3f} ms, p99 {r['p99_ms']:.3f} ms"
+        )
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = compare(results, json.load(f), args.threshold)
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Export the pickled model to the small JSON artifact used for serving.
+
+The artifact holds the coefficients, intercept, feature order and training
+metadata, so the API can score without importing pandas or scikit-learn.
+
+    python export_model.py
+    python export_model.py --compare   # also report cold-start timings
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import warnings
+
+import joblib
+import sklearn
+
+from scoring import (
+    ARTIFACT_PATH,
+    BASE_DIR,
+    LEGACY_MODEL_PATH,
+    LinearScorer,
+    check_parity,
+    load_artifact,
+    save_artifact,
+)
+
+# Run in a fresh interpreter so nothing is already imported or cached
+COLD_START_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+client = app.app.test_client()
+client.post("/predict", json={})
+first = time.perf_counter()
+print(json.dumps({"import_s": imported - start, "first_prediction_s": first - start}))
+"""
+
+
+def sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def export(model_path, output, training=None):
+    # Unpickling drops the sklearn version the model was trained with, except
+    # from the warning raised when it differs from the installed one
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        model = joblib.load(model_path)
+    trained_with = next(
+        (
+            w.message.original_sklearn_version
+            for w in caught
+            if hasattr(w.message, "original_sklearn_version")
+        ),
+        sklearn.__version__,
+    )
+    scorer = LinearScorer.from_model(model)
+    parity = check_parity(scorer, model)
+    # Pipelines are described by their steps and the final estimator's params
+    steps = [step for _, step in getattr(model, "steps", [("model", model)])]
+    metadata = {
+        "model_type": " -> ".join(type(step).__name__ for step in steps),
+        "params": {k: v for k, v in steps[-1].get_params().items() if v is not None},
+        "classes": model.classes_.tolist(),
+        "trained_with_sklearn": trained_with,
+        "exported_with_sklearn": sklearn.__version__,
+        "source": os.path.basename(model_path),
+        "source_sha256": sha256(model_path),
+        "parity_max_abs_diff": parity,
+        "exported_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+    }
+    if training:
+        metadata["training"] = training
+    save_artifact(scorer, output, metadata)
+    # Round-trip to make sure what was written is what will be served
+    check_parity(load_artifact(output), model)
+    print(f"Wrote {output} (max difference from predict_proba {parity:.2g})")
+
+
+def measure_cold_start(model_path):
+    env = dict(os.environ, MODEL_PATH=model_path, PYTHONWARNINGS="ignore")
+    result = subprocess.run(
+        [sys.executable, "-c", COLD_START_SCRIPT],
+        cwd=BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default=LEGACY_MODEL_PATH, help="pickled model")
+    parser.add_argument("--output", default=ARTIFACT_PATH)
+    parser.add_argument(
+        "--compare",
+        action="store_true",
+        help="report import time and time to first prediction for both formats",
+    )
+    args = parser.parse_args(argv)
+
+    export(args.model, args.output)
+    if args.compare:
+        for label, path in (("pickle", args.model), ("artifact", args.output)):
+            timings = measure_cold_start(path)
+            print(
+                f"{label}: import {timings['import_s'] * 1000:.0f} ms,"
+                f" first prediction {timings['first_prediction_s'] * 1000:.0f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
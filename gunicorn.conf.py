@@ -0,0 +1,37 @@
+# Production serving: gunicorn -c gunicorn.conf.py app:app
+import gc
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+worker_class = "gthread" if threads > 1 else "sync"
+keepalive = 5
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+# On SIGTERM workers stop accepting connections and finish in-flight requests
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+errorlog = "-"
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG")
+
+# Live reload for docker-compose development; reloading needs a fresh import
+# in each worker, so it cannot be combined with preloading
+reload = os.environ.get("GUNICORN_RELOAD") == "1"
+
+# Load and warm the model once in the master, then fork the workers so they
+# share its memory copy-on-write
+preload_app = not reload
+
+
+def when_ready(server):
+    # Move everything loaded so far out of the garbage collector's reach, so
+    # collections in the workers do not touch (and copy) the shared pages
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    # Start model polling as soon as the worker is up rather than on its
+    # first request, so a worker whose first load failed can still recover
+    from app import registry
+
+    registry.start()
@@ -0,0 +1,169 @@
+"""Load-test the /predict endpoint with concurrent single-applicant requests.
+
+Point it at a running server, or let it start one itself so the Flask dev
+server and the gunicorn production mode can be compared on the same machine:
+
+    python loadtest.py --serve dev
+    python loadtest.py --serve gunicorn --concurrency 32
+    python loadtest.py --url http://localhost:5000 --duration 30
+"""
+
+import argparse
+import csv
+import http.client
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVE_COMMANDS = {
+    "dev": [sys.executable, "app.py"],
+    "gunicorn": [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+}
+
+
+def load_payloads(path, limit):
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))[:limit]
+    for row in rows:
+        row.pop("loan_status", None)
+    return [json.dumps({k: float(v) for k, v in row.items()}) for row in rows]
+
+
+def start_server(mode, port):
+    env = dict(os.environ, PORT=str(port))
+    # New session so the dev server's reloader child is stopped with it
+    return subprocess.Popen(
+        SERVE_COMMANDS[mode],
+        cwd=BASE_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def stop_server(process):
+    os.killpg(process.pid, signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+
+
+def wait_until_ready(url, timeout=60):
+    """Poll /ready until the server answers 200."""
+    parsed = urllib.parse.urlsplit(url)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=2)
+            conn.request("GET", "/ready")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    sys.exit(f"Server at {url} did not become ready within {timeout}s")
+
+
+def worker(url, payloads, offset, deadline, latencies, errors):
+    """Send requests over one keep-alive connection until the deadline."""
+    parsed = urllib.parse.urlsplit(url)
+    headers = {"Content-Type": "application/json"}
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=30)
+    i = offset
+    while time.perf_counter() < deadline:
+        body = payloads[i % len(payloads)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            conn.request("POST", "/predict", body, headers)
+            response = conn.getresponse()
+            response.read()
+            ok = response.status == 200
+        except (OSError, http.client.HTTPException):
+            ok = False
+            conn.close()
+            conn = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=30)
+        if ok:
+            latencies.append(time.perf_counter() - start)
+        else:
+            errors.append(1)
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return float("nan")
+    index = min(len(sorted_values) - 1, int(q / 100 * len(sorted_values)))
+    return sorted_values[index]
+
+
+def run(url, payloads, concurrency, duration):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(
+            target=worker,
+            args=(url, payloads, i * 997, deadline, latencies, errors),
+        )
+        for i in range(concurrency)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p90_ms": percentile(latencies, 90) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:5000")
+    parser.add_argument(
+        "--serve",
+        choices=sorted(SERVE_COMMANDS),
+        help="start this server mode on --port for the duration of the test",
+    )
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10, help="seconds")
+    parser.add_argument("--data", default=os.path.join(BASE_DIR, "smaller_dataset.csv"))
+    parser.add_argument("--rows", type=int, default=5000, help="distinct payloads")
+    args = parser.parse_args(argv)
+
+    payloads = load_payloads(args.data, args.rows)
+    url = f"http://127.0.0.1:{args.port}" if args.serve else args.url
+    server = start_server(args.serve, args.port) if args.serve else None
+    try:
+        wait_until_ready(url)
+        result = run(url, payloads, args.concurrency, args.duration)
+    finally:
+        if server:
+            stop_server(server)
+
+    label = args.serve or url
+    print(
+        f"{label}: {result['requests']} requests, {result['errors']} errors,"
+        f" {result['rps']:.0f} req/s, p50 {result['p50_ms']:.2f} ms,"
+        f" p90 {result['p90_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+
+# Where RECORD_REQUESTS=1 writes traffic and benchmark.py replays it from
+RECORD_PATH = os.environ.get("RECORD_PATH") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "requests.jsonl"
+)
+
+# Seconds; covers sub-millisecond scoring up to slow batch requests
+LATENCY_BUCKETS = (
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+
+
+class Histogram:
+    """Counts of observations per bucket upper bound (last bucket is +Inf)."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def snapshot(self):
+        labels = [str(b) for b in self.buckets] + ["+Inf"]
+        return {
+            "buckets": [[le, n] for le, n in zip(labels, self.counts)],
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+        }
+
+    def prometheus(self, name, labels=""):
+        """Exposition lines, with the cumulative buckets Prometheus expects."""
+        sep = "," if labels else ""
+        lines = []
+        cumulative = 0
+        for le, n in zip([str(b) for b in self.buckets] + ["+Inf"], self.counts):
+            cumulative += n
+            lines.append(f'{name}_bucket{{{labels}{sep}le="{le}"}} {cumulative}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {self.total}")
+        lines.append(f"{name}_count{suffix} {self.count}")
+        return lines
+
+
+class _StageTimer:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.metrics.observe_stage(self.name, time.perf_counter() - self.start)
+
+
+class _NullTimer:
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    """Request, error and per-stage latency metrics for the scoring path.
+
+    Counters are per process; with several gunicorn workers each one serves
+    its own /metrics.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.request_latency = {}
+        self.stage_latency = {}
+        self.requests = {}
+        self.errors = {}
+
+    def stage(self, name):
+        """Context manager timing one stage of request handling."""
+        return _StageTimer(self, name) if self.enabled else _NULL_TIMER
+
+    def observe_stage(self, name, seconds):
+        with self._lock:
+            histogram = self.stage_latency.get(name)
+            if histogram is None:
+                histogram = self.stage_latency[name] = Histogram(LATENCY_BUCKETS)
+            histogram.observe(seconds)
+
+    def observe_request(self, endpoint, status, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.request_latency.get(endpoint)
+            if histogram is None:
+                histogram = self.request_latency[endpoint] = Histogram(LATENCY_BUCKETS)
+            histogram.observe(seconds)
+            key = (endpoint, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            if status >= 400:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def render(self):
+        """Prometheus text exposition of the request and stage metrics."""
+        with self._lock:
+            lines = [
+                "# HELP credit_risk_request_duration_seconds Request latency.",
+                "# TYPE credit_risk_request_duration_seconds histogram",
+            ]
+            for endpoint, histogram in sorted(self.request_latency.items()):
+                lines += histogram.prometheus(
+                    "credit_risk_request_duration_seconds", f'endpoint="{endpoint}"'
+                )
+            lines += [
+                "# HELP credit_risk_stage_duration_seconds Time spent per stage.",
+                "# TYPE credit_risk_stage_duration_seconds histogram",
+            ]
+            for stage, histogram in sorted(self.stage_latency.items()):
+                lines += histogram.prometheus(
+                    "credit_risk_stage_duration_seconds", f'stage="{stage}"'
+                )
+            lines += [
+                "# HELP credit_risk_requests_total Requests by endpoint and status.",
+                "# TYPE credit_risk_requests_total counter",
+            ]
+            for (endpoint, status), n in sorted(self.requests.items()):
+                lines.append(
+                    f'credit_risk_requests_total{{endpoint="{endpoint}",'
+                    f'status="{status}"}} {n}'
+                )
+            lines += [
+                "# HELP credit_risk_request_errors_total Requests answered with 4xx/5xx.",
+                "# TYPE credit_risk_request_errors_total counter",
+            ]
+            for endpoint, n in sorted(self.errors.items()):
+                lines.append(
+                    f'credit_risk_request_errors_total{{endpoint="{endpoint}"}} {n}'
+                )
+        return lines
+
+
+def counter_lines(name, help_text, value, kind="counter", labels=""):
+    """Exposition lines for a single unlabelled (or fixed-label) sample."""
+    suffix = f"{{{labels}}}" if labels else ""
+    return [
+        f"# HELP {name} {help_text}",
+        f"# TYPE {name} {kind}",
+        f"{name}{suffix} {value}",
+    ]
+
+
+class RequestRecorder:
+    """Appends request/response records to a JSON Lines file off the hot path.
+
+    ``record`` only appends the raw bodies to an in-memory buffer; a
+    background thread decodes them and writes buffered records every
+    ``flush_interval`` seconds. When the buffered bodies would exceed
+    ``max_bytes`` new records are dropped (and counted) instead of blocking.
+    """
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024, flush_interval=1.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.written = 0
+        self._buffer = deque()
+        self._buffered_bytes = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pid = None
+
+    def _ensure_started(self):
+        # Threads do not survive fork, so each gunicorn worker starts its own
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._buffer.clear()
+                self._buffered_bytes = 0
+                threading.Thread(target=self._run, daemon=True).start()
+                atexit.register(self.flush)
+                self._pid = os.getpid()
+
+    def record(self, entry, request_body=b"", response_body=b""):
+        """Buffer ``entry`` with the raw request and (JSON) response bodies."""
+        self._ensure_started()
+        size = len(request_body) + len(response_body)
+        with self._lock:
+            if self._buffered_bytes + size > self.max_bytes:
+                self.dropped += 1
+                return
+            self._buffered_bytes += size
+            self._buffer.append((entry, request_body, response_body))
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                records, self._buffer = self._buffer, deque()
+                self._buffered_bytes = 0
+            lines = []
+            for entry, request_body, response_body in records:
+                entry["request"] = request_body.decode("utf-8", "replace")
+                try:
+                    entry["response"] = json.loads(response_body)
+                except ValueError:
+                    entry["response"] = None
+                lines.append(json.dumps(entry) + "\n")
+            if lines:
+                with open(self.path, "a") as f:
+                    f.writelines(lines)
+                self.written += len(lines)
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Request recorder failed to write {self.path}: {e}")
+
+
+def recorder_from_env():
+    """Build the request recorder from environment variables (None if off)."""
+    if os.environ.get("RECORD_REQUESTS") != "1":
+        return None
+    return RequestRecorder(
+        RECORD_PATH,
+        max_bytes=int(float(os.environ.get("RECORD_BUFFER_MB", 64)) * 1024 * 1024),
+    )
@@ -0,0 +1,185 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class LocalBackend:
+    """Dict-backed stand-in for a shared backend, for development and tests."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value, expires_at = self._data.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.time():
+            return None
+        return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl if ttl else None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisBackend:
+    """Shares cached probabilities between gunicorn workers through Redis."""
+
+    def __init__(self, url, prefix="credit-risk:prediction:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return None if value is None else float(value)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, repr(value), ex=int(ttl) if ttl else None)
+
+    def clear(self):
+        # Keys embed the model version, so stale entries just stop matching
+        pass
+
+
+class PredictionCache:
+    """Bounded LRU cache of probabilities keyed on rounded feature values.
+
+    Keys also carry the model version that produced the value, so entries
+    from a replaced model never match again; ``clear`` is called on every
+    model swap to free them. Entries can expire after ``ttl`` seconds. An
+    optional shared ``backend`` is consulted on local misses so workers can
+    reuse each other's results.
+    """
+
+    def __init__(
+        self,
+        maxsize=1024,
+        ttl=None,
+        decimals=6,
+        backend=None,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.decimals = decimals
+        self.backend = backend
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.backend_errors = 0
+
+    def key(self, row, version=""):
+        values = ",".join(repr(round(x, self.decimals) + 0.0) for x in row)
+        return f"{version}:{values}"
+
+    def get(self, row, version=""):
+        """Cached probability for a feature row, or None on a miss."""
+        key = self.key(row, version)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+
+        if self.backend is not None:
+            try:
+                value = self.backend.get(key)
+            except Exception:
+                self.backend_errors += 1
+                value = None
+            if value is not None:
+                self._store(key, value)
+                with self._lock:
+                    self.shared_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, row, value, version=""):
+        key = self.key(row, version)
+        self._store(key, value)
+        if self.backend is not None:
+            try:
+                self.backend.set(key, value, self.ttl)
+            except Exception:
+                self.backend_errors += 1
+
+    def _store(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+        if self.backend is not None:
+            try:
+                self.backend.clear()
+            except Exception:
+                self.backend_errors += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "backend_errors": self.backend_errors,
+            }
+
+
+def cache_from_env():
+    """Build the prediction cache from environment variables (None if off)."""
+    maxsize = int(os.environ.get("CACHE_SIZE", 0))
+    if maxsize <= 0:
+        return None
+
+    ttl = float(os.environ.get("CACHE_TTL", 0)) or None
+    backend_url = os.environ.get("CACHE_BACKEND_URL")
+    backend = None
+    if backend_url == "local":
+        backend = LocalBackend()
+    elif backend_url:
+        try:
+            backend = RedisBackend(backend_url)
+        except Exception as e:
+            print(f"Shared prediction cache disabled: {e}")
+
+    return PredictionCache(
+        maxsize=maxsize,
+        ttl=ttl,
+        decimals=int(os.environ.get("CACHE_DECIMALS", 6)),
+        backend=backend,
+    )
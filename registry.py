@@ -0,0 +1,310 @@
+import hashlib
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from batcher import batcher_from_env
+from scoring import (
+    FEATURES,
+    HOLDOUT_PATH,
+    MODEL_PATH,
+    PARITY_DATASET,
+    load_model,
+    score_features,
+)
+
+HOLDOUT_TARGET = "loan_status"
+# Shadow comparisons queued beyond this are dropped rather than piling up
+MAX_PENDING_SHADOWS = 1000
+
+
+class ModelVersion:
+    """One loaded model file, identified by its name and content hash."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        name = os.path.splitext(os.path.basename(path))[0]
+        self.version = f"{name}@{hashlib.sha256(data).hexdigest()[:12]}"
+        self.path = path
+        start = time.perf_counter()
+        # Load the bytes that were hashed, in case the file is replaced meanwhile
+        self.model, self.scorer = load_model(path, data)
+        # Updated by the registry to include holdout validation and warm-up
+        self.load_seconds = time.perf_counter() - start
+        self.loaded_at = time.time()
+        self.holdout_auc = None
+        self.batcher = batcher_from_env(self.score_many)
+
+    def score_many(self, features):
+        return score_features(self.model, self.scorer, features)
+
+    def score(self, row):
+        """Probability for one feature row, through the micro-batcher if on."""
+        if self.batcher:
+            return self.batcher.score(row)
+        if self.scorer is not None:
+            return self.scorer.score(row)
+        return float(self.score_many(np.array([row]))[0])
+
+    def close(self):
+        if self.batcher:
+            self.batcher.close()
+
+    def describe(self):
+        return {
+            "version": self.version,
+            "path": self.path,
+            "loaded_at": self.loaded_at,
+            "load_seconds": self.load_seconds,
+            "fast_path": self.scorer is not None,
+            "holdout_auc": self.holdout_auc,
+        }
+
+
+def load_holdout(path, rows):
+    """Last ``rows`` rows of a numeric CSV as (features, labels or None)."""
+    with open(path) as f:
+        header = f.readline().strip().split(",")
+        # Stream the file and keep only the tail, however long it is
+        lines = deque(f, maxlen=rows)
+    data = np.loadtxt(lines, delimiter=",", ndmin=2)
+    features = data[:, [header.index(name) for name in FEATURES]]
+    labels = data[:, header.index(HOLDOUT_TARGET)] if HOLDOUT_TARGET in header else None
+    return features, labels
+
+
+def roc_auc(labels, probs):
+    """Rank-based ROC AUC (ties get their average rank)."""
+    positives = labels == 1
+    n_pos, n_neg = int(positives.sum()), int((~positives).sum())
+    if not n_pos or not n_neg:
+        return None
+    ranks = np.empty(len(probs))
+    ranks[np.argsort(probs, kind="mergesort")] = np.arange(1, len(probs) + 1)
+    _, inverse, counts = np.unique(probs, return_inverse=True, return_counts=True)
+    ranks = (np.bincount(inverse, weights=ranks) / counts)[inverse]
+    return float((ranks[positives].sum() - n_pos * (n_pos + 1) / 2) / (n_pos * n_neg))
+
+
+class ModelRegistry:
+    """Serves the active model and optionally a candidate next to it.
+
+    A background thread polls the model files. A changed file is loaded and
+    validated on a holdout sample off the request path, then swapped in with
+    a single reference assignment, so in-flight requests finish on the
+    version they started with. The candidate either takes a weighted share
+    of traffic ("split") or is scored alongside the active model without
+    affecting responses ("shadow").
+    """
+
+    def __init__(
+        self,
+        path,
+        candidate_path=None,
+        candidate_weight=0.1,
+        shadow=False,
+        poll_interval=5.0,
+        holdout_path=HOLDOUT_PATH,
+        holdout_rows=2000,
+        min_auc=0.55,
+    ):
+        self.path = path
+        self.candidate_path = candidate_path
+        self.candidate_weight = candidate_weight
+        self.shadow = shadow
+        self.poll_interval = poll_interval
+        self.min_auc = min_auc
+
+        self.active = None
+        self.candidate = None
+        self.on_swap = []
+        self.swaps = 0
+        self.last_error = None
+
+        self._fingerprints = {}
+        self._lock = threading.Lock()
+        self._pid = None
+        self._shadow_pool = None
+        self._pending_shadows = 0
+        self.shadow_stats = {
+            "compared": 0,
+            "dropped": 0,
+            "errors": 0,
+            "mean_abs_diff": None,
+            "max_abs_diff": 0.0,
+        }
+        self._shadow_diff_total = 0.0
+
+        if not os.path.exists(holdout_path):
+            print(
+                f"{holdout_path} not found (run train.py); validating on the end of"
+                f" {PARITY_DATASET}, which may overlap the training data"
+            )
+            holdout_path = PARITY_DATASET
+        self.holdout_path = holdout_path
+        try:
+            self.holdout = load_holdout(holdout_path, holdout_rows)
+        except Exception as e:
+            print(f"Model holdout unavailable, only sanity checks will run: {e}")
+            self.holdout = None
+
+        self.refresh()
+
+    def validate(self, version):
+        """Reject versions whose holdout scores are invalid or too weak.
+
+        Scoring the holdout also warms the model before it takes traffic.
+        """
+        if self.holdout is None:
+            features, labels = np.array([[0.0] * len(FEATURES)]), None
+        else:
+            features, labels = self.holdout
+        probs = np.asarray(version.score_many(features), dtype=float)
+        if not np.all(np.isfinite(probs)) or probs.min() < 0 or probs.max() > 1:
+            raise ValueError("holdout probabilities are not valid probabilities")
+        if version.scorer is not None:
+            version.scorer.score(features[0].tolist())
+        if labels is not None:
+            version.holdout_auc = roc_auc(labels, probs)
+            if version.holdout_auc is not None and version.holdout_auc < self.min_auc:
+                raise ValueError(
+                    f"holdout ROC AUC {version.holdout_auc:.3f} < {self.min_auc}"
+                )
+
+    def refresh(self):
+        """Load, validate and swap in any model file that changed on disk."""
+        for slot, path in (("active", self.path), ("candidate", self.candidate_path)):
+            if not path:
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            fingerprint = (stat.st_mtime_ns, stat.st_size)
+            if self._fingerprints.get(slot) == fingerprint:
+                continue
+            # Remember failed files too, so a bad file is retried only once it changes
+            self._fingerprints[slot] = fingerprint
+
+            try:
+                start = time.perf_counter()
+                version = ModelVersion(path)
+                self.validate(version)
+                version.load_seconds = time.perf_counter() - start
+            except Exception as e:
+                self.last_error = f"{path}: {e}"
+                print(f"Error loading model {path}: {e}")
+                continue
+
+            old = getattr(self, slot)
+            if old is not None and old.version == version.version:
+                version.close()
+                continue
+            setattr(self, slot, version)
+            self.swaps += 1
+            for callback in self.on_swap:
+                callback(version)
+            if old is not None:
+                old.close()
+
+    def start(self):
+        """Start the polling thread and shadow pool in this process.
+
+        Threads do not survive fork, so each gunicorn worker starts its own;
+        calling it again in the same process does nothing.
+        """
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._shadow_pool = ThreadPoolExecutor(1)
+            self._pending_shadows = 0
+            if self.poll_interval > 0:
+                threading.Thread(target=self._poll, daemon=True).start()
+            self._pid = os.getpid()
+
+    def _poll(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                self.last_error = str(e)
+
+    def route(self):
+        """Pick the version serving this request and the one to shadow, if any."""
+        self.start()
+        active, candidate = self.active, self.candidate
+        if candidate is None:
+            return active, None
+        if active is None:
+            return candidate, None
+        if self.shadow:
+            return active, candidate
+        if random.random() < self.candidate_weight:
+            return candidate, None
+        return active, None
+
+    def shadow_score(self, version, features, served):
+        """Score ``features`` with ``version`` in the background and record how
+        far its probabilities are from the ``served`` ones."""
+        with self._lock:
+            if self._pending_shadows >= MAX_PENDING_SHADOWS:
+                self.shadow_stats["dropped"] += 1
+                return
+            self._pending_shadows += 1
+        self._shadow_pool.submit(self._compare, version, features, served)
+
+    def _compare(self, version, features, served):
+        try:
+            diff = np.abs(version.score_many(features) - np.asarray(served))
+        except Exception:
+            with self._lock:
+                self._pending_shadows -= 1
+                self.shadow_stats["errors"] += 1
+            return
+        with self._lock:
+            self._pending_shadows -= 1
+            stats = self.shadow_stats
+            stats["compared"] += len(diff)
+            self._shadow_diff_total += float(diff.sum())
+            stats["mean_abs_diff"] = self._shadow_diff_total / stats["compared"]
+            stats["max_abs_diff"] = max(stats["max_abs_diff"], float(diff.max()))
+
+    def stats(self):
+        mode = None
+        if self.candidate is not None:
+            mode = "shadow" if self.shadow else "split"
+        with self._lock:
+            shadow_stats = dict(self.shadow_stats)
+        return {
+            "active": self.active.describe() if self.active else None,
+            "candidate": self.candidate.describe() if self.candidate else None,
+            "mode": mode,
+            "candidate_weight": self.candidate_weight,
+            "swaps": self.swaps,
+            "last_error": self.last_error,
+            "poll_interval": self.poll_interval,
+            "holdout_path": self.holdout_path,
+            "shadow": shadow_stats,
+        }
+
+
+def registry_from_env():
+    return ModelRegistry(
+        MODEL_PATH,
+        candidate_path=os.environ.get("MODEL_CANDIDATE_PATH"),
+        candidate_weight=float(os.environ.get("MODEL_CANDIDATE_WEIGHT", 0.1)),
+        shadow=os.environ.get("MODEL_CANDIDATE_MODE", "split") == "shadow",
+        poll_interval=float(os.environ.get("MODEL_POLL_INTERVAL", 5)),
+        holdout_path=os.environ.get("MODEL_HOLDOUT_PATH", HOLDOUT_PATH),
+        holdout_rows=int(os.environ.get("MODEL_HOLDOUT_ROWS", 2000)),
+        min_auc=float(os.environ.get("MODEL_MIN_AUC", 0.55)),
+    )
@@ -0,0 +1,224 @@
+"""Score a large CSV or Parquet file of applicants offline.
+
+The input is read in fixed-size chunks, each chunk is scored in one
+vectorized call and appended to the output, so peak memory depends on the
+chunk size rather than on the file size. Progress is checkpointed after every
+chunk; re-running the same command after a crash resumes from the last
+finished chunk.
+
+    python score_file.py loans.csv scored.csv --chunksize 200000 --workers 4
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from scoring import MODEL_PATH, frame_to_features, load_model, score_features
+
+PARQUET_SUFFIXES = (".parquet", ".pq")
+
+# Set per process by init_worker
+_model = None
+_scorer = None
+
+
+def init_worker(model_path):
+    global _model, _scorer
+    _model, _scorer = load_model(model_path)
+
+
+def score_chunk(df):
+    """Append a ``probability`` column to one chunk; invalid rows get NaN."""
+    features, valid = frame_to_features(df)
+    probs = score_features(_model, _scorer, features)
+    df["probability"] = np.where(valid, probs, np.nan)
+    return df
+
+
+def is_parquet(path):
+    return path.lower().endswith(PARQUET_SUFFIXES)
+
+
+def read_chunks(path, chunksize, skip_rows):
+    """Yield DataFrames of ``chunksize`` rows, starting after ``skip_rows``."""
+    if not is_parquet(path):
+        # A callable keeps memory flat; pandas turns a range into a set
+        skip = (lambda i: 0 < i <= skip_rows) if skip_rows else None
+        yield from pd.read_csv(path, chunksize=chunksize, skiprows=skip)
+        return
+
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        sys.exit("Reading Parquet requires pyarrow: pip install pyarrow")
+
+    skipped = 0
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+        if skipped < skip_rows:
+            skipped += batch.num_rows
+            continue
+        yield batch.to_pandas()
+
+
+class ChunkWriter:
+    """Appends scored chunks to a CSV file or a directory of Parquet parts."""
+
+    def __init__(self, path, progress):
+        self.path = path
+        self.parquet = is_parquet(path)
+        if self.parquet:
+            os.makedirs(path, exist_ok=True)
+            if not progress["chunks_done"]:
+                # Parts left by an earlier (possibly longer) run are not ours
+                for name in os.listdir(path):
+                    if name.startswith("part-") and name.endswith(".parquet"):
+                        os.remove(os.path.join(path, name))
+        else:
+            # Drop anything written after the last checkpoint (a partial chunk)
+            mode = "r+b" if progress["chunks_done"] else "wb"
+            self.file = open(path, mode)
+            self.file.truncate(progress["output_bytes"])
+            self.file.seek(progress["output_bytes"])
+
+    def write(self, df, chunk_index):
+        if self.parquet:
+            df.to_parquet(
+                os.path.join(self.path, f"part-{chunk_index:05d}.parquet"),
+                index=False,
+            )
+            return 0
+        df.to_csv(self.file, header=chunk_index == 0, index=False)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def close(self):
+        if not self.parquet:
+            self.file.close()
+
+
+def load_progress(path, args):
+    fresh = {
+        "input": os.path.abspath(args.input),
+        "chunksize": args.chunksize,
+        "chunks_done": 0,
+        "rows_done": 0,
+        "output_bytes": 0,
+    }
+    if args.restart or not os.path.exists(path):
+        return fresh
+    with open(path) as f:
+        progress = json.load(f)
+    if (progress["input"], progress["chunksize"]) != (fresh["input"], args.chunksize):
+        sys.exit(f"{path} belongs to another run; pass --restart to start over")
+    return progress
+
+
+def save_progress(path, progress):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(progress, f)
+    os.replace(tmp, path)
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process, in MB."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def score_chunk_in_worker(df):
+    """``score_chunk`` plus this worker's pid and peak RSS so far."""
+    return score_chunk(df), os.getpid(), peak_rss_mb()
+
+
+def scored_chunks(chunks, args, worker_peaks):
+    """Score chunks in order, in-process or across a bounded process pool.
+
+    Each worker's latest peak RSS is kept in ``worker_peaks`` by pid.
+    """
+    if args.workers <= 1:
+        init_worker(args.model)
+        for df in chunks:
+            yield score_chunk(df)
+        return
+
+    def collect(future):
+        df, pid, peak = future.result()
+        worker_peaks[pid] = peak
+        return df
+
+    with ProcessPoolExecutor(
+        args.workers, initializer=init_worker, initargs=(args.model,)
+    ) as pool:
+        # Keep a few chunks in flight per worker so memory stays bounded
+        pending = deque()
+        for df in chunks:
+            pending.append(pool.submit(score_chunk_in_worker, df))
+            if len(pending) >= 2 * args.workers:
+                yield collect(pending.popleft())
+        while pending:
+            yield collect(pending.popleft())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="CSV or Parquet file of applicants")
+    parser.add_argument(
+        "output", help="CSV file, or Parquet directory if it ends in .parquet"
+    )
+    parser.add_argument("--model", default=MODEL_PATH, help="model artifact or pickle")
+    parser.add_argument("--chunksize", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=1, help="scoring processes")
+    parser.add_argument(
+        "--restart", action="store_true", help="ignore any saved progress"
+    )
+    args = parser.parse_args(argv)
+
+    progress_path = args.output.rstrip("/") + ".progress"
+    progress = load_progress(progress_path, args)
+    if progress["chunks_done"]:
+        print(
+            f"Resuming after chunk {progress['chunks_done']}"
+            f" ({progress['rows_done']} rows already scored)"
+        )
+
+    start = time.perf_counter()
+    rows = 0
+    writer = ChunkWriter(args.output, progress)
+    worker_peaks = {}
+    try:
+        chunks = read_chunks(args.input, args.chunksize, progress["rows_done"])
+        for df in scored_chunks(chunks, args, worker_peaks):
+            progress["output_bytes"] = writer.write(df, progress["chunks_done"])
+            progress["chunks_done"] += 1
+            progress["rows_done"] += len(df)
+            rows += len(df)
+            save_progress(progress_path, progress)
+    finally:
+        writer.close()
+    if os.path.exists(progress_path):
+        os.remove(progress_path)
+
+    elapsed = time.perf_counter() - start
+    # Each process's own peak; the peaks need not have happened at once
+    peak = peak_rss_mb() + sum(worker_peaks.values())
+    processes = f" over {len(worker_peaks) + 1} processes" if worker_peaks else ""
+    print(
+        f"Scored {rows} rows in {elapsed:.2f}s"
+        f" ({rows / elapsed if elapsed else 0:,.0f} rows/sec),"
+        f" peak RSS {peak:.1f} MB{processes}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+import json
+import math
+import os
+
+import numpy as np
+
+# pandas, joblib and scikit-learn are imported only where the legacy pickle
+# path needs them, so serving from the JSON artifact starts quickly
+
+# Model features, in training order, with the defaults used for missing fields
+FEATURE_DEFAULTS = {
+    "fico_range_low": 700,
+    "annual_inc": 48000,
+    "dti": 20,
+    "loan_amnt": 9000,
+    "revol_bal": 5000,
+}
+FEATURES = list(FEATURE_DEFAULTS)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LEGACY_MODEL_PATH = os.path.join(BASE_DIR, "credit_risk_model.pkl")
+ARTIFACT_PATH = os.path.join(BASE_DIR, "credit_risk_model.json")
+# MODEL_PATH overrides; otherwise prefer the exported artifact when present
+MODEL_PATH = os.environ.get("MODEL_PATH") or (
+    ARTIFACT_PATH if os.path.exists(ARTIFACT_PATH) else LEGACY_MODEL_PATH
+)
+ARTIFACT_FORMAT = "credit-risk-linear"
+ARTIFACT_VERSION = 1
+PARITY_DATASET = os.path.join(BASE_DIR, "smaller_dataset.csv")
+# Test split written by train.py, never seen during training
+HOLDOUT_PATH = os.path.join(BASE_DIR, "holdout.csv")
+# Largest absolute probability difference tolerated between the two scorers
+PARITY_TOLERANCE = float(os.environ.get("SCORER_PARITY_TOL", 1e-6))
+
+
+def coerce_features(data):
+    """Turn one applicant dict into a list of floats in FEATURES order."""
+    if not isinstance(data, dict):
+        raise ValueError("Applicant must be a JSON object")
+
+    row = []
+    for name, default in FEATURE_DEFAULTS.items():
+        value = float(data.get(name, default))
+        if not math.isfinite(value):
+            raise ValueError(f"{name} must be a finite number")
+        row.append(value)
+    return row
+
+
+class LinearScorer:
+    """Closed-form sigmoid(x . coef + intercept) for a binary linear model.
+
+    Gives the same class-1 probability as ``predict_proba`` without going
+    through pandas or sklearn's input validation.
+    """
+
+    def __init__(self, coef, intercept):
+        self.coef = np.asarray(coef, dtype=float).ravel()
+        self.intercept = float(intercept)
+        # Plain Python copy for the single-row path, where NumPy overhead dominates
+        self._coef_list = self.coef.tolist()
+
+    @classmethod
+    def from_model(cls, model):
+        """Compile a fitted linear classifier, or a Pipeline of scalers ending
+        in one, into a single coefficient vector."""
+        steps = getattr(model, "steps", None)
+        if steps is not None:
+            return cls._from_pipeline(model)
+
+        coef = getattr(model, "coef_", None)
+        intercept = getattr(model, "intercept_", None)
+        if coef is None or intercept is None:
+            raise ValueError(f"{type(model).__name__} is not a linear model")
+        if len(getattr(model, "classes_", ())) != 2:
+            raise ValueError("Only binary classifiers can be compiled")
+        if np.shape(coef) != (1, len(FEATURES)):
+            raise ValueError(f"Unexpected coefficient shape {np.shape(coef)}")
+        names = getattr(model, "feature_names_in_", None)
+        if names is not None and list(names) != FEATURES:
+            raise ValueError(f"Model was trained on {list(names)}, not {FEATURES}")
+        return cls(coef, np.ravel(intercept)[0])
+
+    @classmethod
+    def _from_pipeline(cls, pipeline):
+        names = getattr(pipeline, "feature_names_in_", None)
+        if names is not None and list(names) != FEATURES:
+            raise ValueError(f"Model was trained on {list(names)}, not {FEATURES}")
+
+        # Only reached for pickled sklearn pipelines, so sklearn is installed
+        from sklearn.preprocessing import StandardScaler
+
+        *transforms, (_, final) = pipeline.steps
+        scorer = cls.from_model(final)
+        coef, intercept = scorer.coef, scorer.intercept
+        # Fold each (x - mean_) / scale_ step into the coefficients, last first
+        for name, step in reversed(transforms):
+            if not isinstance(step, StandardScaler):
+                raise ValueError(f"Cannot compile pipeline step {name!r}")
+            # mean_ is fitted even with with_mean=False, so go by the flags
+            mean = step.mean_ if step.with_mean else np.zeros_like(coef)
+            scale = step.scale_ if step.with_std else 1.0
+            coef = coef / scale
+            intercept = intercept - float(np.dot(coef, mean))
+        return cls(coef, intercept)
+
+    def score(self, row):
+        """Probability of class 1 for one row of floats in FEATURES order."""
+        z = self.intercept
+        for c, x in zip(self._coef_list, row):
+            z += c * x
+        # Split on the sign so math.exp never overflows
+        if z >= 0:
+            return 1.0 / (1.0 + math.exp(-z))
+        e = math.exp(z)
+        return e / (1.0 + e)
+
+    def score_many(self, features):
+        """Probabilities of class 1 for a 2-D array with FEATURES columns."""
+        z = np.asarray(features, dtype=float) @ self.coef + self.intercept
+        with np.errstate(over="ignore"):
+            return 1.0 / (1.0 + np.exp(-z))
+
+    def predict_proba(self, features):
+        """sklearn-compatible two-column probabilities."""
+        probs = self.score_many(features)
+        return np.column_stack([1.0 - probs, probs])
+
+    def to_artifact(self, metadata=None):
+        return {
+            "format": ARTIFACT_FORMAT,
+            "version": ARTIFACT_VERSION,
+            "features": FEATURES,
+            "coef": self.coef.tolist(),
+            "intercept": self.intercept,
+            "metadata": metadata or {},
+        }
+
+    @classmethod
+    def from_artifact(cls, artifact):
+        if artifact.get("format") != ARTIFACT_FORMAT:
+            raise ValueError(f"Not a {ARTIFACT_FORMAT} artifact")
+        if artifact.get("version") != ARTIFACT_VERSION:
+            raise ValueError(f"Unsupported artifact version {artifact.get('version')}")
+        if artifact["features"] != FEATURES:
+            raise ValueError(f"Artifact features {artifact['features']} != {FEATURES}")
+        scorer = cls(artifact["coef"], artifact["intercept"])
+        scorer.metadata = artifact.get("metadata", {})
+        return scorer
+
+
+def check_parity(scorer, model, path=PARITY_DATASET, tolerance=PARITY_TOLERANCE):
+    """Compare the compiled scorer with ``predict_proba`` on a sample dataset.
+
+    Returns the largest absolute difference, or raises ValueError if it is
+    above ``tolerance``.
+    """
+    import pandas as pd
+
+    sample = pd.read_csv(path, usecols=FEATURES)[FEATURES]
+    expected = model.predict_proba(sample)[:, 1]
+    actual = scorer.score_many(sample.to_numpy(dtype=float))
+    diff = float(np.max(np.abs(expected - actual))) if len(sample) else 0.0
+    if diff > tolerance:
+        raise ValueError(f"Compiled scorer differs from predict_proba by {diff:.3g}")
+    return diff
+
+
+def compile_scorer(model):
+    """Return a verified LinearScorer for ``model``, or None to use sklearn."""
+    if os.environ.get("FAST_SCORER", "1") == "0":
+        return None
+    try:
+        scorer = LinearScorer.from_model(model)
+        check_parity(scorer, model)
+    except Exception as e:
+        print(f"Compiled scorer disabled, falling back to predict_proba: {e}")
+        return None
+    return scorer
+
+
+def save_artifact(scorer, path, metadata=None):
+    # Write then rename, so a polling registry never sees a partial file
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(scorer.to_artifact(metadata), f, indent=2)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def load_artifact(path):
+    with open(path) as f:
+        return LinearScorer.from_artifact(json.load(f))
+
+
+def load_model(path=MODEL_PATH, data=None):
+    """Load a model and its compiled scorer (None if unavailable).
+
+    A ``.json`` artifact is its own scorer; anything else is unpickled with
+    joblib, which pulls in scikit-learn. Pass the file's ``data`` when it
+    has already been read, so the model matches exactly those bytes.
+    """
+    if path.endswith(".json"):
+        if data is None:
+            scorer = load_artifact(path)
+        else:
+            scorer = LinearScorer.from_artifact(json.loads(data))
+        return scorer, scorer
+
+    import io
+
+    import joblib
+
+    model = joblib.load(path if data is None else io.BytesIO(data))
+    return model, compile_scorer(model)
+
+
+def score_features(model, scorer, features):
+    """Class-1 probabilities for a 2-D array of features in FEATURES order."""
+    if scorer is not None:
+        return scorer.score_many(features)
+    import pandas as pd
+
+    return model.predict_proba(pd.DataFrame(features, columns=FEATURES))[:, 1]
+
+
+def frame_to_features(df):
+    """Vectorized coerce_features for a DataFrame of applicants.
+
+    Returns the feature array and a boolean mask of the rows that are valid.
+    Missing columns and empty cells take the defaults; values that are not
+    finite numbers mark the row invalid (its features are left at defaults).
+    """
+    import pandas as pd
+
+    raw = df.reindex(columns=FEATURES)
+    numeric = raw.apply(pd.to_numeric, errors="coerce")
+    invalid = (numeric.isna() & raw.notna()).to_numpy()
+    features = numeric.fillna(FEATURE_DEFAULTS).to_numpy(dtype=float)
+    invalid |= ~np.isfinite(features)
+    valid = ~invalid.any(axis=1)
+    features[~valid] = list(FEATURE_DEFAULTS.values())
+    return features, valid
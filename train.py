@@ -0,0 +1,160 @@
+"""Train the credit risk model (replaces the ``Data processing.ipynb`` steps).
+
+Parsed data is cached as columnar ``.npz`` files under ``.cache/`` so re-runs
+skip the CSV parse. Cross-validated fits for every C value run in parallel,
+scaling and the classifier are saved together as one sklearn Pipeline, and
+every run's timings, memory and metrics are appended to training_runs.jsonl.
+A sample of the test split is written to holdout.csv, where the model registry
+validates new model versions on rows they were not trained on.
+
+    python train.py
+    python train.py --data loans.csv --C 0.01 0.1 1 10 --cv 5 --jobs -1
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import (
+    accuracy_score,
+    f1_score,
+    log_loss,
+    precision_score,
+    recall_score,
+    roc_auc_score,
+)
+from sklearn.model_selection import GridSearchCV, train_test_split
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+from export_model import export
+from score_file import peak_rss_mb
+from scoring import ARTIFACT_PATH, BASE_DIR, FEATURES, HOLDOUT_PATH, LEGACY_MODEL_PATH
+
+TARGET = "loan_status"
+CACHE_DIR = os.path.join(BASE_DIR, ".cache")
+RUNS_LOG = os.path.join(BASE_DIR, "training_runs.jsonl")
+
+
+def load_dataset(path, use_cache=True):
+    """Read the training CSV, or its cached columnar copy if still fresh."""
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    name = os.path.splitext(os.path.basename(path))[0]
+    digest = hashlib.sha1(key.encode()).hexdigest()[:12]
+    cached = os.path.join(CACHE_DIR, f"{name}-{digest}.npz")
+
+    if use_cache and os.path.exists(cached):
+        with np.load(cached) as data:
+            return pd.DataFrame({column: data[column] for column in data.files}), True
+
+    df = pd.read_csv(path, usecols=FEATURES + [TARGET])[FEATURES + [TARGET]]
+    if use_cache:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = cached + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, **{column: df[column].to_numpy() for column in df.columns})
+        os.replace(tmp, cached)
+    return df, False
+
+
+def evaluate(model, X, y):
+    probs = model.predict_proba(X)[:, 1]
+    preds = (probs >= 0.5).astype(int)
+    return {
+        "accuracy": accuracy_score(y, preds),
+        "roc_auc": roc_auc_score(y, probs),
+        "log_loss": log_loss(y, probs),
+        "precision": precision_score(y, preds, zero_division=0),
+        "recall": recall_score(y, preds, zero_division=0),
+        "f1": f1_score(y, preds, zero_division=0),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", default=os.path.join(BASE_DIR, "smaller_dataset.csv"))
+    parser.add_argument("--output", default=LEGACY_MODEL_PATH, help="pipeline pickle")
+    parser.add_argument("--artifact", default=ARTIFACT_PATH, help="JSON artifact")
+    parser.add_argument("--holdout", default=HOLDOUT_PATH, help="test split CSV")
+    parser.add_argument(
+        "--holdout-rows",
+        type=int,
+        default=int(os.environ.get("MODEL_HOLDOUT_ROWS", 2000)),
+        help="test rows written to --holdout for the model registry",
+    )
+    parser.add_argument("--C", type=float, nargs="+", default=[0.01, 0.1, 1.0, 10.0])
+    parser.add_argument("--cv", type=int, default=5, help="cross-validation folds")
+    parser.add_argument("--jobs", type=int, default=-1, help="parallel fits")
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--random-state", type=int, default=42)
+    parser.add_argument("--no-cache", action="store_true", help="always parse CSV")
+    parser.add_argument("--runs-log", default=RUNS_LOG)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    df, from_cache = load_dataset(args.data, use_cache=not args.no_cache)
+    load_s = time.perf_counter() - start
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        df[FEATURES],
+        df[TARGET],
+        test_size=args.test_size,
+        random_state=args.random_state,
+    )
+
+    search = GridSearchCV(
+        make_pipeline(StandardScaler(), LogisticRegression(max_iter=1000)),
+        {"logisticregression__C": args.C},
+        cv=args.cv,
+        scoring="roc_auc",
+        n_jobs=args.jobs,
+    )
+    fit_start = time.perf_counter()
+    search.fit(X_train, y_train)
+    fit_s = time.perf_counter() - fit_start
+
+    model = search.best_estimator_
+    metrics = evaluate(model, X_test, y_test)
+    # Write then rename, so a polling registry never sees a partial file
+    joblib.dump(model, args.output + ".tmp")
+    os.replace(args.output + ".tmp", args.output)
+    # The split is already shuffled, so its first rows are a random sample
+    holdout = X_test.assign(**{TARGET: y_test}).iloc[: args.holdout_rows]
+    holdout.to_csv(args.holdout, index=False)
+
+    run = {
+        "finished_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "data": os.path.basename(args.data),
+        "rows": len(df),
+        "data_from_cache": from_cache,
+        "best_C": search.best_params_["logisticregression__C"],
+        "cv_roc_auc": search.best_score_,
+        "test": metrics,
+        "load_s": load_s,
+        "fit_s": fit_s,
+        "total_s": time.perf_counter() - start,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    export(args.output, args.artifact, training=run)
+    with open(args.runs_log, "a") as f:
+        f.write(json.dumps(run) + "\n")
+
+    print(
+        f"Trained on {len(df)} rows in {run['total_s']:.2f}s"
+        f" (load {load_s:.2f}s{' from cache' if from_cache else ''},"
+        f" fit {fit_s:.2f}s), best C={run['best_C']},"
+        f" test accuracy {metrics['accuracy']:.3f}, ROC AUC {metrics['roc_auc']:.3f},"
+        f" peak RSS {run['peak_rss_mb']:.0f} MB"
+    )
+
+
+if __name__ == "__main__":
+    main()